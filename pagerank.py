@@ -1,3 +1,5 @@
+import bisect
+import itertools
 import os
 import random
 import re
@@ -6,6 +8,8 @@ import sys
 DAMPING = 0.85
 SAMPLES = 10000
 
+LINK_RE = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
 
 def main():
     if len(sys.argv) != 2:
@@ -33,17 +37,18 @@ def crawl(directory):
     for filename in os.listdir(directory):
         if not filename.endswith(".html"):
             continue
-        with open(os.path.join(directory, filename)) as f:
+        with open(os.path.join(directory, filename), "rb") as f:
             contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
+        pages[filename] = {
+            match.group(1).decode() for match in LINK_RE.finditer(contents)
+        }
 
-    # Only include links to other pages in the corpus
+    # Only include links to other pages in the corpus, excluding self-links
     for filename in pages:
-        pages[filename] = set(
+        pages[filename] = {
             link for link in pages[filename]
-            if link in pages
-        )
+            if link in pages and link != filename
+        }
 
     return pages
 
@@ -97,28 +102,33 @@ def sample_pagerank(corpus, damping_factor, n):
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    # Initialize a dictionary to store PageRank estimates
-    pagerank = {page: 0 for page in corpus}
+    # Precompute the cumulative transition weights for every page once,
+    # indexed by position in `pages`, so the sampling loop does not
+    # rebuild the model or any lists on each step
+    pages = list(corpus)
+    cum_weights = []
+    for page in pages:
+        transition_probabilities = transition_model(corpus, page, damping_factor)
+        cum_weights.append(list(itertools.accumulate(
+            transition_probabilities[p] for p in pages
+        )))
+
+    # Count visits per page index
+    counts = [0] * len(pages)
 
     # Start with a random page
-    page = random.choice(list(corpus.keys()))
+    index = random.randrange(len(pages))
 
     for _ in range(n):
-        # Generate a transition model for the current page
-        transition_probabilities = transition_model(corpus, page, damping_factor)
-
         # Choose the next page based on the transition model
-        page = random.choices(list(transition_probabilities.keys()), weights=list(transition_probabilities.values()))[0]
+        cum = cum_weights[index]
+        index = min(bisect.bisect(cum, random.random() * cum[-1]), len(pages) - 1)
 
         # Update the count for the chosen page
-        pagerank[page] += 1
+        counts[index] += 1
 
     # Normalize the counts to get PageRank estimates
-    total_samples = sum(pagerank.values())
-    for page in pagerank:
-        pagerank[page] /= total_samples
-
-    return pagerank
+    return {page: counts[i] / n for i, page in enumerate(pages)}
 
 
 def iterate_pagerank(corpus, damping_factor):
@@ -137,13 +147,29 @@ def iterate_pagerank(corpus, damping_factor):
     # Convergence threshold
     threshold = 0.001
 
+    # Precompute the incoming links of every page, so each iteration only
+    # touches actual links instead of scanning all pairs of pages.
+    # A page with no outgoing links is treated as linking to every page
+    incoming = {page: [] for page in corpus}
+    dangling = []
+    for p in corpus:
+        if corpus[p]:
+            for page in corpus[p]:
+                incoming[page].append(p)
+        else:
+            dangling.append(p)
+
     while True:
+        # Probability to jump to any page, plus the share of every
+        # page without links that is spread evenly over the corpus
+        base_rank = (1 - damping_factor) / n
+        base_rank += damping_factor * sum(pagerank[p] for p in dangling) / n
+
         new_pagerank = {}
         for page in corpus:
-            new_rank = (1 - damping_factor) / n  # Start with the probability to jump to any page
-            for p in corpus:
-                if page in corpus[p]:
-                    new_rank += damping_factor * pagerank[p] / len(corpus[p])
+            new_rank = base_rank
+            for p in incoming[page]:
+                new_rank += damping_factor * pagerank[p] / len(corpus[p])
             new_pagerank[page] = new_rank
 
         # Check for convergence